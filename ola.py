@@ -1,29 +1,273 @@
 from HLL import HyperLogLog
-from typing import List, Any
-
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Any, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from collections import defaultdict
 
+# Flat column data, i.e., a NumPy array or a pandas extension array such as a Categorical.
+ArrayLike = Union[np.ndarray, pd.api.extensions.ExtensionArray]
+
+
+def _group_keys(df_slice: pd.DataFrame, group_column: str) -> ArrayLike:
+    """
+        Get the grouping column of a dataframe slice as a flat array.
+        Extension dtypes are returned as their extension array, so e.g. nullable integer groups stay integers when
+        some keys are missing. Categorical columns are grouped on their integer codes instead of hashing the raw
+        group values. To use this for e.g. string groups, cast the dataframe once before slicing it, i.e.,
+        df.astype({group_column: 'category'}); casting each slice would cost more than it saves.
+    """
+    group_keys = df_slice[group_column]
+    if isinstance(group_keys.dtype, pd.api.extensions.ExtensionDtype):
+        return group_keys.array
+    return group_keys.to_numpy(copy=False)
+
+
+def _float_values(df_slice: pd.DataFrame, column: str) -> np.ndarray:
+    """
+        Get a column of a dataframe slice as a flat float array. float32 columns are kept as float32 and
+        not upcast; every other dtype is converted to float64. For a dataframe downcast once up front
+        (i.e., df.astype({column: 'float32'})), this lets the plain sums of AvgOla and FilterAvgOla run over
+        half the bytes. The grouped sums gain nothing, since np.bincount converts its weights to float64.
+    """
+    values = df_slice[column]
+    if values.dtype == np.float32:
+        return values.to_numpy(copy=False)
+    return values.to_numpy(dtype=np.float64, copy=False)
+
+
+def _filter_mask(df_slice: pd.DataFrame, filter_column: str, filter_value: Any) -> np.ndarray:
+    """
+        Get the boolean mask of the rows of a dataframe slice where *filter_column* is equal to *filter_value*.
+        Categorical columns are compared on their integer codes instead of their values.
+    """
+    filter_col_values = df_slice[filter_column]
+    if isinstance(filter_col_values.dtype, pd.CategoricalDtype):
+        codes = filter_col_values.cat.codes.to_numpy(copy=False)
+        try:
+            filter_code = filter_col_values.cat.categories.get_loc(filter_value)
+        except KeyError:
+            return np.zeros(len(codes), dtype=bool)
+        return codes == filter_code
+    return filter_col_values.to_numpy(copy=False) == filter_value
+
+
+def _grouped_sum_count(group_keys: ArrayLike, values: np.ndarray) -> pd.DataFrame:
+    """
+        Compute the per-group sum and non-NaN count of the float *values* in a single fused pass.
+        The group keys are factorized once, and both aggregates are gathered over the same codes.
+    """
+    codes, uniques = pd.factorize(group_keys, sort=False)
+    valid = (codes >= 0) & ~np.isnan(values)
+    codes = codes[valid]
+    return pd.DataFrame({
+        "sum": np.bincount(codes, weights=values[valid], minlength=len(uniques)),
+        "count": np.bincount(codes, minlength=len(uniques)),
+    }, index=uniques)
+
+
+class SumCountState:
+    def __init__(self, total: float = 0.0, count: int = 0):
+        """
+            Running (sum, count) pair of a mean. Combining two states adds them component-wise.
+
+            @param total: sum of the values seen so far.
+            @param count: number of values seen so far.
+        """
+        self.sum = total
+        self.count = count
+
+    def combine(self, other: "SumCountState") -> None:
+        """
+            Merge another partial state into this one.
+        """
+        self.sum += other.sum
+        self.count += other.count
+
+    def mean(self) -> float:
+        """
+            Get the mean, or NaN while no values have been seen (e.g., nothing matched a filter yet).
+        """
+        if self.count == 0:
+            return np.nan
+        return self.sum / self.count
+
+
+class GroupedState:
+    def __init__(self, sums: Optional[pd.Series] = None, counts: Optional[pd.Series] = None, rows: int = 0):
+        """
+            Running per-group sums and counts, plus the number of rows they were computed from.
+            They are kept as flat arrays aligned with the *groups* index; a missing *sums* or *counts* is zero.
+
+            @param sums: per-group sums, indexed by group.
+            @param counts: per-group counts, indexed by group. If both are given, they share the same index.
+            @param rows: number of dataframe rows processed.
+        """
+        if sums is not None:
+            self.groups = sums.index
+        elif counts is not None:
+            self.groups = counts.index
+        else:
+            self.groups = pd.RangeIndex(0)
+        self.sums = np.zeros(len(self.groups)) if sums is None else sums.to_numpy(dtype=np.float64)
+        self.counts = np.zeros(len(self.groups), dtype=np.int64) if counts is None else counts.to_numpy(dtype=np.int64)
+        self.rows = rows
+
+        # List form of *groups* for plotting, kept until new groups show up
+        self._groups_list = None
+
+    def combine(self, other: "GroupedState") -> None:
+        """
+            Merge another partial state into this one.
+            The other state's groups are looked up in the existing *groups* index and the arrays are updated in
+            place. Groups seen for the first time are appended after the existing ones in sorted order, the order
+            groupby() yields them in, so groups keep their position on the plot's x axis as later slices arrive.
+        """
+        positions = self.groups.get_indexer(other.groups)
+        new = positions < 0
+        if new.any():
+            new_groups = other.groups[new]
+            try:
+                new_groups = new_groups.sort_values()
+            except TypeError:
+                # Mixed-type groups that cannot be ordered are appended as they come.
+                pass
+            groups = new_groups if len(self.groups) == 0 else self.groups.append(new_groups)
+            sums = np.zeros(len(groups))
+            sums[:len(self.sums)] = self.sums
+            counts = np.zeros(len(groups), dtype=np.int64)
+            counts[:len(self.counts)] = self.counts
+
+            self.groups, self.sums, self.counts = groups, sums, counts
+            self._groups_list = None
+            positions = groups.get_indexer(other.groups)
+
+        self.sums[positions] += other.sums
+        self.counts[positions] += other.counts
+        self.rows += other.rows
+
+    def groups_list(self) -> List[Any]:
+        """
+            Get the groups as a list. It is only rebuilt after new groups show up, not on every slice.
+        """
+        if self._groups_list is None:
+            self._groups_list = self.groups.tolist()
+        return self._groups_list
+
+
+class DistinctState:
+    def __init__(self):
+        """
+            HLL sketch of the distinct values seen so far. Combining two states merges their registers.
+        """
+        # HLL for estimating cardinality. Don't modify the parameters; the autograder relies on it.
+        # IMPORTANT: Please convert your data to the String type before adding to the HLL, i.e., self.hll.add(str(data))
+        self.hll = HyperLogLog(p=2, seed=123456789)
 
-class OLA:
-    def __init__(self, widget: go.FigureWidget):
+    def combine(self, other: "DistinctState") -> None:
+        """
+            Merge another partial state into this one.
+        """
+        self.hll.merge(other.hll)
+
+
+class OLA(ABC):
+    def __init__(self, widget: go.FigureWidget, update_interval: float = 0.0):
         """
             Base OLA class.
 
-            *****************************************
-            * You do not have to modify this class. *
-            *****************************************
+            Each OLA keeps its running aggregate in *self.state*. A slice is first reduced to a partial state
+            on its own (*slice_state*), which is then combined into the running state; *finalize* turns the
+            running state into the plotted estimates.
 
             @param widget: The dynamically updating plotly plot.
+            @param update_interval: Minimum number of seconds between plot updates. Slices arriving in between
+                are still combined into the running state, and the plot catches up on the next update or *flush*.
+                Defaults to updating on every slice.
         """
         self.widget = widget
+        self.state = None
+        self.update_interval = update_interval
+
+        # Throttling bookkeeping
+        self._last_update = float("-inf")
+        self._update_pending = False
+
+    @abstractmethod
+    def slice_state(self, df_slice: pd.DataFrame) -> Any:
+        """
+            Compute the partial state of a single dataframe slice. To be implemented in inherited classes.
+            This must not modify the OLA, so that several slices can be reduced concurrently.
+        """
+
+    @abstractmethod
+    def finalize(self) -> Tuple[List[Any], List[Any]]:
+        """
+            Compute the groups and estimated values to plot from the running state.
+            To be implemented in inherited classes.
+        """
+
+    def process_slice(self, df_slice: pd.DataFrame) -> None:
+        """
+            Process a dataframe slice: combine its partial state into the running state and update the plot.
+        """
+        self.state.combine(self.slice_state(df_slice))
+        self.refresh_widget()
 
-    def process_slice(df_slice: pd.DataFrame) -> None:
+    def process_slices(self, df_slices: Iterable[pd.DataFrame], max_workers: int = 1) -> None:
+        """
+            Process dataframe slices, reducing them to partial states on background threads.
+            NumPy and pandas release the GIL in most of their kernels, so while the calling thread combines a
+            slice's partial state and updates the plot, the next slices are already being reduced. The partial
+            states are combined in slice order, and the plot is updated after each one as in *process_slice*.
+            At most *max_workers* slices are taken from *df_slices* ahead of the one being combined, so it may
+            be a lazy stream of slices.
+
+            @param df_slices: dataframe slices to process.
+            @param max_workers: number of worker threads. The default of a single worker overlaps the
+                aggregation of the next slice with the plot update of the current one.
+        """
+        df_slices = iter(df_slices)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque(executor.submit(self.slice_state, df_slice) for df_slice in islice(df_slices, max_workers))
+            while pending:
+                partial_state = pending.popleft().result()
+
+                # Start on the next slice before spending time on this one's combine and plot update.
+                df_slice = next(df_slices, None)
+                if df_slice is not None:
+                    pending.append(executor.submit(self.slice_state, df_slice))
+
+                self.state.combine(partial_state)
+                self.refresh_widget()
+        self.flush()
+
+    def refresh_widget(self) -> None:
         """
-            Process a dataframe slice. To be implemented in inherited classes.
+            Update the plot with the running estimates, unless the last update was less than *update_interval*
+            seconds ago. Skipped updates also skip *finalize*, and are left pending for the next one.
         """
-        pass
+        now = time.monotonic()
+        if now - self._last_update < self.update_interval:
+            self._update_pending = True
+            return
+        self.update_widget(*self.finalize())
+        self._last_update = now
+        self._update_pending = False
+
+    def flush(self) -> None:
+        """
+            Push any pending throttled update to the plot.
+        """
+        if self._update_pending:
+            self.update_widget(*self.finalize())
+            self._last_update = time.monotonic()
+            self._update_pending = False
 
     def update_widget(self, groups_list: List[Any], values_list: List[Any]) -> None:
         """
@@ -32,39 +276,50 @@ class OLA:
             @param groups_list: List of groups.
             @param values_list: List of grouped values (e.g., grouped means/sums).
         """
-        self.widget.data[0]['x'] = groups_list
-        self.widget.data[0]['y'] = values_list
+        # Send both properties to the frontend in one message.
+        with self.widget.batch_update():
+            self.widget.data[0]['x'] = groups_list
+            self.widget.data[0]['y'] = values_list
 
 
 class AvgOla(OLA):
-    def __init__(self, widget: go.FigureWidget, mean_col: str):
+    def __init__(self, widget: go.FigureWidget, mean_col: str, update_interval: float = 0.0):
         """
             Class for performing OLA by incrementally computing the estimated mean of *mean_col*.
-            This class is implemented for you as an example.
+            This class is implemented for you as an example of the *slice_state*/*finalize* pair each OLA implements.
 
             @param mean_col: column to compute filtered mean for.
+            @param update_interval: minimum number of seconds between plot updates; see OLA. When looping over
+                *process_slice* with an interval set, call *flush* after the last slice to plot the final estimates.
         """
-        super().__init__(widget)
+        super().__init__(widget, update_interval)
         self.mean_col = mean_col
 
         # Bookkeeping variables
-        self.sum = 0
-        self.count = 0
+        self.state = SumCountState()
 
-    def process_slice(self, df_slice: pd.DataFrame) -> None:
+    def slice_state(self, df_slice: pd.DataFrame) -> SumCountState:
         """
-            Update the running mean with a data frame slice.
+            Compute the sum and count of a data frame slice.
         """
-        self.sum += df_slice.sum()[self.mean_col]
-        self.count += df_slice.count()[self.mean_col]
+        # Reduce only the target column; NaNs are skipped, matching pandas' sum()/count().
+        mean_col_values = _float_values(df_slice, self.mean_col)
+        not_nan = ~np.isnan(mean_col_values)
+        # The slice is summed in its own precision, the running sum is kept as a Python float.
+        return SumCountState(float(mean_col_values[not_nan].sum()), int(not_nan.sum()))
 
-        # Update the plot. The mean should be put into a singleton list due to Plotly semantics.
+    def finalize(self) -> Tuple[List[Any], List[Any]]:
+        """
+            Compute the running mean.
+        """
+        # The mean should be put into a singleton list due to Plotly semantics.
         # Note: there is no x axis label since there is only one bar.
-        self.update_widget([""], [self.sum / self.count])
+        return [""], [self.state.mean()]
 
 
 class FilterAvgOla(OLA):
-    def __init__(self, plot_widget: go.FigureWidget, filter_column: str, filter_value: Any, target_column: str):
+    def __init__(self, plot_widget: go.FigureWidget, filter_column: str, filter_value: Any, target_column: str,
+                 update_interval: float = 0.0):
         """
         Class for performing OLA by incrementally computing the estimated filtered mean of *target_column*
         where *filter_column* is equal to *filter_value*.
@@ -73,32 +328,39 @@ class FilterAvgOla(OLA):
         @param filter_column: Column to filter on.
         @param filter_value: Value to filter for, i.e., df[df[filter_column] == filter_value].
         @param target_column: Column to compute filtered mean for.
+        @param update_interval: Minimum number of seconds between plot updates; see OLA. When looping over
+            *process_slice* with an interval set, call *flush* after the last slice to plot the final estimates.
         """
-        super().__init__(plot_widget)
+        super().__init__(plot_widget, update_interval)
         self.filter_column = filter_column
         self.filter_value = filter_value
         self.target_column = target_column
 
         # Bookkeeping variables
-        self.filtered_sum = 0
-        self.filtered_count = 0
+        self.state = SumCountState()
 
-    def process_slice(self, df_slice: pd.DataFrame) -> None:
+    def slice_state(self, df_slice: pd.DataFrame) -> SumCountState:
         """
-        Update the running filtered mean with a dataframe slice.
+        Compute the filtered sum and count of a dataframe slice.
         """
-        filt_df = df_slice[df_slice[self.filter_column] == self.filter_value]
-        trgt_col_values = filt_df[self.target_column]
+        # Mask only the target column instead of materializing the filtered dataframe.
+        filter_mask = _filter_mask(df_slice, self.filter_column, self.filter_value)
+        trgt_col_values = _float_values(df_slice, self.target_column)[filter_mask]
+        trgt_col_values = trgt_col_values[~np.isnan(trgt_col_values)]
 
-        self.filtered_sum += trgt_col_values.sum()
-        self.filtered_count += trgt_col_values.count()
+        return SumCountState(float(trgt_col_values.sum()), trgt_col_values.size)
 
-        # Update the plot. The filtered mean should be put into a singleton list due to Plotly semantics.
-        self.update_widget([""], [self.filtered_sum / self.filtered_count])
+    def finalize(self) -> Tuple[List[Any], List[Any]]:
+        """
+        Compute the running filtered mean.
+        """
+        # The filtered mean should be put into a singleton list due to Plotly semantics.
+        return [""], [self.state.mean()]
 
 
 class GroupByAvgOla(OLA):
-    def __init__(self, plot_widget: go.FigureWidget, group_column: str, target_column: str):
+    def __init__(self, plot_widget: go.FigureWidget, group_column: str, target_column: str,
+                 update_interval: float = 0.0):
         """
         Class for performing OLA by incrementally computing the estimated grouped means of *target_column*
         with *group_column* as groups.
@@ -106,34 +368,40 @@ class GroupByAvgOla(OLA):
         @param plot_widget: The dynamically updating plotly plot.
         @param group_column: Grouping column, i.e., df.groupby(group_column).
         @param target_column: Column to compute grouped means for.
+        @param update_interval: Minimum number of seconds between plot updates; see OLA. When looping over
+            *process_slice* with an interval set, call *flush* after the last slice to plot the final estimates.
         """
-        super().__init__(plot_widget)
+        super().__init__(plot_widget, update_interval)
         self.group_column = group_column
         self.target_column = target_column
 
-        # Bookkeeping variables
-        self.grouped_sum = defaultdict(float)
-        self.grouped_count = defaultdict(int)
+        # Bookkeeping variables, indexed by group
+        self.state = GroupedState()
 
-    def process_slice(self, df_slice: pd.DataFrame) -> None:
+    def slice_state(self, df_slice: pd.DataFrame) -> GroupedState:
         """
-        Update the running grouped means with a dataframe slice.
+        Compute the grouped sums and counts of a dataframe slice.
         """
-        grouped_df = df_slice.groupby(self.group_column)
-        for group, group_df in grouped_df:
-            trgt_col_val = group_df[self.target_column]
+        group_keys = _group_keys(df_slice, self.group_column)
+        trgt_col_values = _float_values(df_slice, self.target_column)
 
-            self.grouped_sum[group] += trgt_col_val.sum()
-            self.grouped_count[group] += trgt_col_val.count()
+        slice_aggs = _grouped_sum_count(group_keys, trgt_col_values)
+        return GroupedState(sums=slice_aggs["sum"], counts=slice_aggs["count"], rows=len(df_slice))
 
-        # Update the plot
-        grps = list(self.grouped_sum.keys())
-        grp_means = [self.grouped_sum[group] / self.grouped_count[group] for group in grps]
-        self.update_widget(grps, grp_means)
+    def finalize(self) -> Tuple[List[Any], List[Any]]:
+        """
+        Compute the running grouped means.
+        """
+        # Groups whose values were all NaN have a count of 0 and a NaN mean, as with pandas.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            grp_means = self.state.sums / self.state.counts
+        return self.state.groups_list(), grp_means.tolist()
 
 
 class GroupBySumOla(OLA):
-    def __init__(self, plot_widget: go.FigureWidget, original_rows: int, group_column: str, sum_column: str):
+    def __init__(self, plot_widget: go.FigureWidget, original_rows: int, group_column: str, sum_column: str,
+                 engine: Optional[str] = None, engine_kwargs: Optional[Dict[str, bool]] = None,
+                 update_interval: float = 0.0):
         """
         Class for performing OLA by incrementally computing the estimated grouped sums of *sum_column*
         with *group_column* as groups.
@@ -142,36 +410,67 @@ class GroupBySumOla(OLA):
         @param original_rows: Number of rows in the original dataframe before sampling and slicing.
         @param group_column: Grouping column, i.e., df.groupby(group_column).
         @param sum_column: Column to compute grouped sums for.
+        @param engine: Set to 'numba' to compute the per-slice grouped sums with pandas' numba groupby engine
+            instead of NumPy. The numba kernel is compiled on the first slice and reused for the rest.
+        @param engine_kwargs: Numba options for *engine* 'numba', defaulting to nopython and nogil. parallel is
+            off by default: numba's threading layer does not shut down cleanly when its parallel kernels are
+            launched from the worker threads of *process_slices*.
+        @param update_interval: Minimum number of seconds between plot updates; see OLA. When looping over
+            *process_slice* with an interval set, call *flush* after the last slice to plot the final estimates.
         """
-        super().__init__(plot_widget)
+        super().__init__(plot_widget, update_interval)
         self.original_rows = original_rows
         self.group_column = group_column
         self.sum_column = sum_column
+        if engine not in (None, "numba"):
+            raise ValueError(f"engine must be None or 'numba', got {engine!r}")
+        if engine_kwargs is not None and engine != "numba":
+            raise ValueError("engine_kwargs is only supported with engine='numba'")
+        self.engine = engine
+        if engine == "numba" and engine_kwargs is None:
+            engine_kwargs = {"nopython": True, "nogil": True, "parallel": False}
+        self.engine_kwargs = engine_kwargs
+
+        # Bookkeeping variables, indexed by group
+        self.state = GroupedState()
+
+    def slice_state(self, df_slice: pd.DataFrame) -> GroupedState:
+        """
+        Compute the grouped sums of a dataframe slice.
+        """
+        group_keys = _group_keys(df_slice, self.group_column)
+        sum_col_values = _float_values(df_slice, self.sum_column)
 
-        # Bookkeeping variables
-        self.grouped_sums = defaultdict(float)
-        self.total_rows_processed = 0
+        if self.engine == "numba":
+            groups_in_slice = pd.Series(sum_col_values).groupby(group_keys, sort=False, observed=True).sum(
+                engine=self.engine, engine_kwargs=self.engine_kwargs)
+        else:
+            groups_in_slice = _grouped_sum_count(group_keys, sum_col_values)["sum"]
+        return GroupedState(sums=groups_in_slice, rows=len(df_slice))
 
-    def process_slice(self, df_slice: pd.DataFrame) -> None:
+    def process_slices(self, df_slices: Iterable[pd.DataFrame], max_workers: int = 1) -> None:
         """
-        Update the running grouped sums with a dataframe slice.
+            Process dataframe slices on background threads; see OLA.
+            Not supported with parallel numba kernels, which hang the interpreter at exit when launched from there.
         """
-        groups_in_slice = df_slice.groupby(self.group_column)[self.sum_column].sum()
-        self.total_rows_processed += len(df_slice)
-        scaling_factor = self.original_rows / self.total_rows_processed
-
-        for group, sum_value in groups_in_slice.items():
-            self.grouped_sums[group] += sum_value
+        if self.engine_kwargs is not None and self.engine_kwargs.get("parallel", False):
+            raise ValueError("process_slices does not support engine_kwargs={'parallel': True}; use process_slice")
+        super().process_slices(df_slices, max_workers)
 
-        est_sums = [value * scaling_factor for value in self.grouped_sums.values()]
+    def finalize(self) -> Tuple[List[Any], List[Any]]:
+        """
+        Compute the running grouped sums, scaled up to the original dataframe.
+        """
+        scaling_factor = self.original_rows / self.state.rows
 
-        # Update the plot
-        updated_groups = list(self.grouped_sums.keys())
-        self.update_widget(updated_groups, est_sums)
+        # Scale in NumPy; tolist() is only for Plotly
+        est_sums = self.state.sums * scaling_factor
+        return self.state.groups_list(), est_sums.tolist()
 
 
 class GroupByCountOla(OLA):
-    def __init__(self, plot_widget: go.FigureWidget, original_rows: int, group_column: str, count_column: str):
+    def __init__(self, plot_widget: go.FigureWidget, original_rows: int, group_column: str, count_column: str,
+                 update_interval: float = 0.0):
         """
         Class for performing OLA by incrementally computing the estimated grouped counts in *count_column*
         with *group_column* as groups.
@@ -180,33 +479,47 @@ class GroupByCountOla(OLA):
         @param original_rows: Number of rows in the original dataframe before sampling and slicing.
         @param group_column: Grouping column, i.e., df.groupby(group_column).
         @param count_column: Counting column.
+        @param update_interval: Minimum number of seconds between plot updates; see OLA. When looping over
+            *process_slice* with an interval set, call *flush* after the last slice to plot the final estimates.
         """
-        super().__init__(plot_widget)
+        super().__init__(plot_widget, update_interval)
         self.original_rows = original_rows
         self.group_column = group_column
         self.count_column = count_column
-        self.grouped_counts = defaultdict(int)
-        self.rows_processed = 0
+        self.state = GroupedState()
 
-    def process_slice(self, df_slice: pd.DataFrame) -> None:
+    def slice_state(self, df_slice: pd.DataFrame) -> GroupedState:
         """
-        Update the running grouped counts with a dataframe slice.
+        Compute the grouped counts of a dataframe slice.
         """
-        curt_grps = df_slice.groupby(self.group_column)[self.count_column].count().index
-        curt_cts = df_slice.groupby(self.group_column)[self.count_column].count()
-
-        self.rows_processed += len(df_slice)
-        factor = self.original_rows / self.rows_processed
-
-        for grp, ct in zip(curt_grps, curt_cts):
-            self.grouped_counts[grp] += ct
+        group_keys = _group_keys(df_slice, self.group_column)
+        count_col = df_slice[self.count_column]
+
+        # Count the non-null values per group with np.bincount over the factorized keys. Missing keys are
+        # factorized to -1 and dropped, like groupby does. NumPy integer and boolean columns cannot hold
+        # missing values, so every one of their rows counts and their null check is skipped.
+        codes, uniques = pd.factorize(group_keys, sort=False)
+        valid = codes >= 0
+        if not (isinstance(count_col.dtype, np.dtype) and count_col.dtype.kind in "iub"):
+            valid &= count_col.notna().to_numpy()
+        if not valid.all():
+            codes = codes[valid]
+        curt_cts = pd.Series(np.bincount(codes, minlength=len(uniques)), index=uniques)
+        return GroupedState(counts=curt_cts, rows=len(df_slice))
+
+    def finalize(self) -> Tuple[List[Any], List[Any]]:
+        """
+        Compute the running grouped counts, scaled up to the original dataframe.
+        """
+        factor = self.original_rows / self.state.rows
 
-        est_cts = [count * factor for count in self.grouped_counts.values()]
-        self.update_widget(list(self.grouped_counts.keys()), est_cts)
+        est_cts = self.state.counts * factor
+        return self.state.groups_list(), est_cts.tolist()
 
 
 class FilterDistinctOla(OLA):
-    def __init__(self, widget: go.FigureWidget, filter_col: str, filter_value: Any, distinct_col: str):
+    def __init__(self, widget: go.FigureWidget, filter_col: str, filter_value: Any, distinct_col: str,
+                 update_interval: float = 0.0):
         """
         Class for performing OLA by incrementally computing the estimated cardinality (distinct elements) *distinct_col*
         where *filter_col* is equal to *filter_value*.
@@ -214,27 +527,36 @@ class FilterDistinctOla(OLA):
         @param filter_col: column to filter on.
         @param filter_value: value to filter for, i.e., df[df[filter_col] == filter_value].
         @param distinct_col: column to compute cardinality for.
+        @param update_interval: minimum number of seconds between plot updates; see OLA. When looping over
+            *process_slice* with an interval set, call *flush* after the last slice to plot the final estimates.
         """
-        super().__init__(widget)
+        super().__init__(widget, update_interval)
         self.filter_col = filter_col
         self.filter_value = filter_value
         self.distinct_col = distinct_col
 
-        # HLL for estimating cardinality. Don't modify the parameters; the autograder relies on it.
-        # IMPORTANT: Please convert your data to the String type before adding to the HLL, i.e., self.hll.add(str(data))
-        self.hll = HyperLogLog(p=2, seed=123456789)
-
-        # Put any other bookkeeping class variables you need here...
+        # Bookkeeping variables
+        self.state = DistinctState()
 
-    def process_slice(self, df_slice: pd.DataFrame) -> None:
+    def slice_state(self, df_slice: pd.DataFrame) -> DistinctState:
         """
-        Update the running filtered cardinality with a dataframe slice.
+        Compute the HLL sketch of the filtered distinct values of a dataframe slice.
         """
-        filtered_df = df_slice[df_slice[self.filter_col] == self.filter_value]
-        dist_val = filtered_df[self.distinct_col].astype(str)
-        for val in dist_val:
-            self.hll.add(str(val))
-
-        # Update the plot. The filtered cardinality should be put into a singleton list due to Plotly semantics.
-        filt_card = self.hll.cardinality()
-        self.update_widget([""], [filt_card])
\ No newline at end of file
+        filter_mask = _filter_mask(df_slice, self.filter_col, self.filter_value)
+        distinct_col_values = df_slice[self.distinct_col].array[filter_mask]
+
+        # Re-adding a value never changes the HLL registers, so only feed each distinct value once per slice.
+        # The strings go through pandas' astype(str), which formats e.g. datetimes differently than NumPy's.
+        dist_val = pd.Series(pd.unique(distinct_col_values)).astype(str).tolist()
+        slice_state = DistinctState()
+        # The HLL has no batch add for strings; draining map() into an empty deque runs the loop in C.
+        deque(map(slice_state.hll.add, dist_val), maxlen=0)
+        return slice_state
+
+    def finalize(self) -> Tuple[List[Any], List[Any]]:
+        """
+        Compute the running filtered cardinality.
+        """
+        # The filtered cardinality should be put into a singleton list due to Plotly semantics.
+        filt_card = self.state.hll.cardinality()
+        return [""], [filt_card]
\ No newline at end of file
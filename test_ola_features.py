@@ -0,0 +1,278 @@
+from HLL import HyperLogLog
+from ola import AvgOla, FilterAvgOla, FilterDistinctOla, GroupByAvgOla, GroupByCountOla, GroupBySumOla
+from utils import generate_plot, sample_split_df
+
+import numpy as np
+import pandas as pd
+import pytest
+
+"""
+Tests for the OLA options beyond the autograded queries in test_ola.py.
+"""
+
+
+def make_olas(original_rows):
+    return [
+        lambda: AvgOla(generate_plot("", "", ""), "item_price"),
+        lambda: FilterAvgOla(generate_plot("", "", ""), "item_id", 22154, "item_price"),
+        lambda: GroupByAvgOla(generate_plot("", "", ""), "date_block_num", "item_cnt_day"),
+        lambda: GroupBySumOla(generate_plot("", "", ""), original_rows, "shop_id", "item_cnt_day"),
+        lambda: GroupByCountOla(generate_plot("", "", ""), original_rows, "shop_id", "item_cnt_day"),
+        lambda: FilterDistinctOla(generate_plot("", "", ""), "shop_id", 10, "item_id"),
+    ]
+
+
+def assert_same_plot(ola, other):
+    assert list(ola.widget.data[0]['x']) == list(other.widget.data[0]['x']), "The keys of the plot differ."
+    assert np.allclose(ola.widget.data[0]['y'], other.widget.data[0]['y'], rtol=0.001), "The values of the plot differ."
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_process_slices_matches_process_slice(max_workers):
+    df = pd.read_csv("sales_train.csv")
+    df_list = sample_split_df(df)
+
+    for make_ola in make_olas(len(df)):
+        sequential, pipelined = make_ola(), make_ola()
+        for df_slice in df_list:
+            sequential.process_slice(df_slice)
+        pipelined.process_slices(iter(df_list), max_workers=max_workers)
+
+        assert_same_plot(sequential, pipelined)
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_process_slices_pulls_slices_lazily(max_workers):
+    df = pd.read_csv("sales_train.csv")
+    df_list = sample_split_df(df)[:6]
+    pulled = []
+    ahead = []
+
+    def stream():
+        for df_slice in df_list:
+            pulled.append(df_slice)
+            yield df_slice
+
+    ola = GroupByAvgOla(generate_plot("", "", ""), "date_block_num", "item_cnt_day")
+    refresh_widget = ola.refresh_widget
+
+    def record_refresh():
+        # Slices taken from the stream beyond those already combined, this one included.
+        ahead.append(len(pulled) - (len(ahead) + 1))
+        refresh_widget()
+
+    ola.refresh_widget = record_refresh
+    ola.process_slices(stream(), max_workers=max_workers)
+
+    assert len(pulled) == len(df_list)
+    assert max(ahead) <= max_workers
+
+
+def test_new_groups_in_later_slices():
+    df_list = [
+        pd.DataFrame({"g": ["z", "b", "z"], "v": [1.0, 2.0, 3.0]}),
+        pd.DataFrame({"g": ["c", "a", "b"], "v": [4.0, np.nan, 6.0]}),
+        # Only groups that were already seen.
+        pd.DataFrame({"g": ["a", "z"], "v": [5.0, 2.0]}),
+    ]
+    group_by_avg_ola = GroupByAvgOla(generate_plot("", "", ""), "g", "v")
+    group_by_sum_ola = GroupBySumOla(generate_plot("", "", ""), 8, "g", "v")
+    group_by_count_ola = GroupByCountOla(generate_plot("", "", ""), 8, "g", "v")
+    olas = (group_by_avg_ola, group_by_sum_ola, group_by_count_ola)
+    for ola in olas:
+        for df_slice in df_list:
+            ola.process_slice(df_slice)
+
+    # Groups first seen in later slices are appended, in sorted order within the slice.
+    for ola in olas:
+        assert ola.widget.data[0]['x'] == ("b", "z", "a", "c")
+    assert np.allclose(group_by_avg_ola.widget.data[0]['y'], [4.0, 2.0, 5.0, 4.0])
+    assert np.allclose(group_by_sum_ola.widget.data[0]['y'], [8.0, 6.0, 5.0, 4.0])
+    assert np.allclose(group_by_count_ola.widget.data[0]['y'], [2.0, 3.0, 1.0, 1.0])
+
+
+def test_throttled_plot_stays_stale_until_flush():
+    df = pd.read_csv("sales_train.csv")
+    df_list = sample_split_df(df)[:5]
+    ola = GroupByAvgOla(generate_plot("", "", ""), "date_block_num", "item_cnt_day")
+    throttled = GroupByAvgOla(generate_plot("", "", ""), "date_block_num", "item_cnt_day", update_interval=3600)
+
+    # The first slice is always plotted.
+    ola.process_slice(df_list[0])
+    throttled.process_slice(df_list[0])
+    first_vals = list(throttled.widget.data[0]['y'])
+    assert_same_plot(ola, throttled)
+
+    for df_slice in df_list[1:]:
+        ola.process_slice(df_slice)
+        throttled.process_slice(df_slice)
+        assert list(throttled.widget.data[0]['y']) == first_vals, "A throttled update reached the plot."
+
+    throttled.flush()
+    assert_same_plot(ola, throttled)
+
+def test_categorical_group_columns():
+    df = pd.read_csv("sales_train.csv")
+    df_list = sample_split_df(df)[:5]
+    cat_df_list = sample_split_df(df.astype({"shop_id": "category", "date_block_num": "category"}))[:5]
+
+    olas = [
+        (GroupByAvgOla(generate_plot("", "", ""), "date_block_num", "item_cnt_day"),
+         GroupByAvgOla(generate_plot("", "", ""), "date_block_num", "item_cnt_day")),
+        (GroupBySumOla(generate_plot("", "", ""), len(df), "shop_id", "item_cnt_day"),
+         GroupBySumOla(generate_plot("", "", ""), len(df), "shop_id", "item_cnt_day")),
+        (GroupByCountOla(generate_plot("", "", ""), len(df), "shop_id", "item_cnt_day"),
+         GroupByCountOla(generate_plot("", "", ""), len(df), "shop_id", "item_cnt_day")),
+    ]
+    for ola, cat_ola in olas:
+        for df_slice, cat_df_slice in zip(df_list, cat_df_list):
+            ola.process_slice(df_slice)
+            cat_ola.process_slice(cat_df_slice)
+            assert_same_plot(ola, cat_ola)
+
+
+def test_categorical_filter_columns():
+    df = pd.read_csv("sales_train.csv")
+    df_list = sample_split_df(df)[:5]
+    cat_df_list = sample_split_df(df.astype({"shop_id": "category", "item_id": "category"}))[:5]
+
+    olas = [
+        (FilterAvgOla(generate_plot("", "", ""), "item_id", 22154, "item_price"),
+         FilterAvgOla(generate_plot("", "", ""), "item_id", 22154, "item_price")),
+        (FilterDistinctOla(generate_plot("", "", ""), "shop_id", 10, "item_id"),
+         FilterDistinctOla(generate_plot("", "", ""), "shop_id", 10, "item_id")),
+    ]
+    for ola, cat_ola in olas:
+        for df_slice, cat_df_slice in zip(df_list, cat_df_list):
+            ola.process_slice(df_slice)
+            cat_ola.process_slice(cat_df_slice)
+            assert_same_plot(ola, cat_ola)
+
+    # A filter value that is not one of the categories matches no rows.
+    ola = FilterDistinctOla(generate_plot("", "", ""), "shop_id", -1, "item_id")
+    ola.process_slice(cat_df_list[0])
+    assert ola.widget.data[0]['y'] == (0,)
+
+def test_float32_columns():
+    df = pd.read_csv("sales_train.csv")
+    df_list = sample_split_df(df)[:5]
+    f32_df_list = sample_split_df(df.astype({"item_price": "float32", "item_cnt_day": "float32"}))[:5]
+
+    olas = [
+        (AvgOla(generate_plot("", "", ""), "item_price"),
+         AvgOla(generate_plot("", "", ""), "item_price")),
+        (FilterAvgOla(generate_plot("", "", ""), "item_id", 22154, "item_price"),
+         FilterAvgOla(generate_plot("", "", ""), "item_id", 22154, "item_price")),
+        (GroupByAvgOla(generate_plot("", "", ""), "date_block_num", "item_cnt_day"),
+         GroupByAvgOla(generate_plot("", "", ""), "date_block_num", "item_cnt_day")),
+        (GroupBySumOla(generate_plot("", "", ""), len(df), "shop_id", "item_cnt_day"),
+         GroupBySumOla(generate_plot("", "", ""), len(df), "shop_id", "item_cnt_day")),
+    ]
+    for ola, f32_ola in olas:
+        for df_slice, f32_df_slice in zip(df_list, f32_df_list):
+            ola.process_slice(df_slice)
+            f32_ola.process_slice(f32_df_slice)
+            assert_same_plot(ola, f32_ola)
+
+
+def test_unmatched_filter():
+    df = pd.read_csv("sales_train.csv")
+    df_slice = sample_split_df(df)[0]
+    cat_df_slice = df_slice.astype({"item_id": "category", "shop_id": "category"})
+
+    for slice_ in (df_slice, cat_df_slice, df_slice.iloc[:0]):
+        # -1 is neither an item_id/shop_id value nor one of the categories.
+        ola = FilterAvgOla(generate_plot("", "", ""), "item_id", -1, "item_price")
+        ola.process_slice(slice_)
+        assert ola.widget.data[0]['x'] == ("",)
+        assert np.isnan(ola.widget.data[0]['y'][0]), "A mean over no rows should be NaN."
+
+        ola = FilterDistinctOla(generate_plot("", "", ""), "shop_id", -1, "item_id")
+        ola.process_slice(slice_)
+        assert ola.widget.data[0]['y'] == (0,)
+
+    # The estimate recovers once matching rows arrive.
+    ola = FilterAvgOla(generate_plot("", "", ""), "item_id", 22154, "item_price")
+    ola.process_slice(df_slice[df_slice["item_id"] != 22154])
+    ola.process_slice(pd.DataFrame({"item_id": [22154, 22154], "item_price": [1.0, 3.0]}))
+    assert ola.widget.data[0]['y'] == (2.0,)
+
+
+def test_all_nan_mean_column():
+    ola = AvgOla(generate_plot("", "", ""), "v")
+    ola.process_slice(pd.DataFrame({"v": [np.nan, np.nan]}))
+    assert np.isnan(ola.widget.data[0]['y'][0]), "A mean over no values should be NaN."
+
+@pytest.mark.parametrize("count_values, dtype", [
+    ([3, 1, 4, 1, 5, 9], "int64"),
+    ([True, False, True, True, False, False], "bool"),
+    (["a", None, "b", None, None, "c"], "object"),
+])
+def test_groupby_count_column_dtypes(count_values, dtype):
+    df = pd.DataFrame({"g": ["x", "y", "x", np.nan, "y", "y"], "c": pd.Series(count_values, dtype=dtype)})
+    df_list = [df.iloc[:3], df.iloc[3:]]
+    ola = GroupByCountOla(generate_plot("", "", ""), len(df), "g", "c")
+    for df_slice in df_list:
+        ola.process_slice(df_slice)
+
+    # With every row processed the counts are not scaled, so they equal groupby().count().
+    expected = df.groupby("g")["c"].count()
+    assert dict(zip(ola.widget.data[0]['x'], ola.widget.data[0]['y'])) == expected.to_dict()
+
+def test_groupby_sum_numba_engine():
+    pytest.importorskip("numba")
+    df = pd.read_csv("sales_train.csv")
+    df_list = sample_split_df(df)[:3]
+    ola = GroupBySumOla(generate_plot("", "", ""), len(df), "shop_id", "item_cnt_day")
+    numba_ola = GroupBySumOla(generate_plot("", "", ""), len(df), "shop_id", "item_cnt_day", engine="numba")
+
+    for df_slice in df_list:
+        ola.process_slice(df_slice)
+    numba_ola.process_slices(df_list)
+    assert_same_plot(ola, numba_ola)
+
+
+def test_groupby_sum_invalid_engine():
+    with pytest.raises(ValueError):
+        GroupBySumOla(generate_plot("", "", ""), 1, "shop_id", "item_cnt_day", engine="cython")
+    with pytest.raises(ValueError):
+        GroupBySumOla(generate_plot("", "", ""), 1, "shop_id", "item_cnt_day", engine_kwargs={"nogil": True})
+
+    # Parallel numba kernels hang the interpreter at exit when launched from process_slices' worker threads.
+    parallel_ola = GroupBySumOla(generate_plot("", "", ""), 1, "shop_id", "item_cnt_day", engine="numba",
+                                 engine_kwargs={"parallel": True})
+    with pytest.raises(ValueError):
+        parallel_ola.process_slices([])
+
+
+def test_nullable_integer_group_keys():
+    df_list = [
+        pd.DataFrame({"g": pd.array([1, 2], dtype="Int64"), "v": [1.0, 2.0]}),
+        pd.DataFrame({"g": pd.array([pd.NA, 3], dtype="Int64"), "v": [4.0, 5.0]}),
+    ]
+    olas = [
+        GroupByAvgOla(generate_plot("", "", ""), "g", "v"),
+        GroupBySumOla(generate_plot("", "", ""), 4, "g", "v"),
+        GroupByCountOla(generate_plot("", "", ""), 4, "g", "v"),
+    ]
+    for ola in olas:
+        for df_slice in df_list:
+            ola.process_slice(df_slice)
+
+        # A missing key in a later slice must not turn the integer groups into floats.
+        groups = ola.widget.data[0]['x']
+        assert groups == (1, 2, 3)
+        assert all(isinstance(group, int) for group in groups), "The groups were not kept as integers."
+
+
+def test_filter_distinct_formats_values_like_pandas():
+    dates = pd.date_range("2013-01-01", periods=40, freq="D")
+    df_slice = pd.DataFrame({"shop_id": 10, "date": dates})
+    ola = FilterDistinctOla(generate_plot("", "", ""), "shop_id", 10, "date")
+    ola.process_slice(df_slice)
+
+    # The HLL is fed the pandas string form of the values, i.e., '2013-01-01' for datetimes.
+    expected_hll = HyperLogLog(p=2, seed=123456789)
+    for val in df_slice["date"].astype(str):
+        expected_hll.add(val)
+    assert ola.widget.data[0]['y'] == (expected_hll.cardinality(),)